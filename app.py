@@ -3,44 +3,47 @@ from datetime import datetime
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
-from src.backend.backend import sectors_list, driver, get_data_for_risk_repartition, get_data_nb_controverties_distrib, get_data_financial_impact_by_controversy_per_sector, get_articles_for_sector_controversy, get_nb_controversies_per_activity
+from src.backend.backend import sectors_list, driver, get_data_for_risk_repartition, get_data_nb_controverties_distrib, get_data_financial_impact_by_controversy_per_sector, get_articles_for_sector_controversy, get_nb_controversies_per_activity, search_articles_by_keyword, get_controversies_list
 st.set_page_config(layout="wide")
 session = driver.session()
 
 # Streamlit App
 st.title("ControVert.ia")
 
-tab1, tab2 = st.tabs(["Overview", "Focus sur un secteur"])
+tab1, tab2, tab3 = st.tabs(["Overview", "Focus sur un secteur", "Recherche d'articles"])
 
 with tab1:
     st.subheader("Overview")
 
     overview_data = get_nb_controversies_per_activity(session)
 
-    activity_nb_articles_fig = px.bar(
-        overview_data.sort_values("number_of_articles", ascending=True),
-        x="number_of_articles",
-        y="activity",
-        orientation="h",
-        color="number_of_articles",
-        color_continuous_scale="Reds",
-        labels={"number_of_articles": "Nombre d'articles", "activity": "Secteur d'activité"},
-    )
-    activity_nb_articles_fig.update_layout(title="Nombre d'articles par secteur d'activité")
-    st.plotly_chart(activity_nb_articles_fig, use_container_width=True)
-
-
-    activity_financial_fig = px.bar(
-        overview_data.dropna(subset="min_perf_diff_2_months").sort_values("min_perf_diff_2_months", ascending=False),
-        x="min_perf_diff_2_months",
-        y="activity",
-        orientation="h",
-        color="min_perf_diff_2_months",
-        color_discrete_sequence=px.colors.sequential.Reds.reverse(),
-        labels={"min_perf_diff_2_months": "Impact boursier sur 2 mois(%)", "activity": "Secteur d'activité"},
-    )
-    activity_financial_fig.update_layout(title="Impact boursier sur 2 mois par secteur d'activité")
-    st.plotly_chart(activity_financial_fig, use_container_width=True)
+    if overview_data is None:
+        st.write("No articles available. Load the data and run python -m src.backend.canonicalize.")
+    else:
+        activity_nb_articles_fig = px.bar(
+            overview_data.sort_values("number_of_articles", ascending=True),
+            x="number_of_articles",
+            y="activity",
+            orientation="h",
+            color="number_of_articles",
+            color_continuous_scale="Reds",
+            labels={"number_of_articles": "Nombre d'articles", "activity": "Secteur d'activité"},
+        )
+        activity_nb_articles_fig.update_layout(title="Nombre d'articles par secteur d'activité")
+        st.plotly_chart(activity_nb_articles_fig, use_container_width=True)
+
+
+        activity_financial_fig = px.bar(
+            overview_data.dropna(subset="min_perf_diff_2_months").sort_values("min_perf_diff_2_months", ascending=False),
+            x="min_perf_diff_2_months",
+            y="activity",
+            orientation="h",
+            color="min_perf_diff_2_months",
+            color_discrete_sequence=px.colors.sequential.Reds.reverse(),
+            labels={"min_perf_diff_2_months": "Impact boursier sur 2 mois(%)", "activity": "Secteur d'activité"},
+        )
+        activity_financial_fig.update_layout(title="Impact boursier sur 2 mois par secteur d'activité")
+        st.plotly_chart(activity_financial_fig, use_container_width=True)
 
 
 with tab2:
@@ -245,4 +248,36 @@ with tab2:
     </script>
     """
 
-    st.components.v1.html(trends_html, height=500)
\ No newline at end of file
+    st.components.v1.html(trends_html, height=500)
+
+
+with tab3:
+    st.subheader("Recherche d'articles")
+
+    search_text = st.text_input("Mots-clés (titre de l'article ou nom d'entreprise):", value="")
+
+    search_col1, search_col2, search_col3 = st.columns([2, 2, 1])
+    with search_col1:
+        search_sector = st.selectbox("Secteur:", ["Tous les secteurs"] + sectors_list, index=0)
+    with search_col2:
+        search_controversy = st.selectbox("Risque:", ["Tous les risques"] + get_controversies_list(session), index=0)
+    with search_col3:
+        search_limit = st.number_input("Nombre de résultats:", min_value=1, max_value=200, value=20)
+
+    if search_text.strip():
+        search_results = search_articles_by_keyword(
+            session,
+            search_text,
+            sector=None if search_sector == "Tous les secteurs" else search_sector,
+            controversy=None if search_controversy == "Tous les risques" else search_controversy,
+            limit=int(search_limit),
+        )
+
+        if search_results is not None and not search_results.empty:
+            search_results = search_results.assign(markdown_name=lambda df: df.apply(lambda x: f'[{x["name"]}]({x["url"]})', axis=1))
+            search_results = search_results.assign(date=lambda df: df["date"].apply(lambda x: datetime.strptime(str(x), "%Y-%m-%dT%H:%M:%SZ").strftime("%Y-%m-%d") if x else ""))
+            search_results = search_results[["markdown_name", "controversies", "perf_1", "perf_2", "date"]]
+            search_results = search_results.rename(columns={"perf_1": "Impact sur le prix de l'action à 1 mois (%)", "perf_2": "Impact sur le prix de l'action à 2 mois (%)", "controversies": "Risques", "markdown_name": "Titre"})
+            st.markdown(search_results.to_markdown(index=False))
+        else:
+            st.write("No articles match the search.")
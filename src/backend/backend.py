@@ -10,10 +10,6 @@ NEO4J_URI = os.environ.get("NEO4J_URI","")
 NEO4J_USERNAME = os.environ.get("NEO4J_USERNAME")
 NEO4J_PASSWORD = os.environ.get("NEO4J_PASSWORD")
 
-with open("src/data_backend/mapping_controversies.json", "r") as f:
-    mapping_controversies = json.load(f)
-with open("src/data_backend/sectors_mapping.json", "r") as f:
-    mapping_sectors = json.load(f)
 with open("src/data_backend/sectors.json", "r") as f:
     sectors_list = json.load(f)
 
@@ -33,38 +29,97 @@ MATCH (sector:Sector)<-[:BELONGS_TO]-(article:Article)-[:LINKED_TO]->(controvers
 RETURN sector.sector_name AS sector_name, 
        COUNT(article) AS number_of_articles
 """
+# Activities and canonical controversy names are set at ingest time by src/backend/canonicalize.py.
+# Graphs without any Activity node have not been canonicalized, sectors are then their own activity.
 overview_data = """
+CALL { MATCH (a:Activity) RETURN COUNT(a) > 0 AS canonicalized }
 MATCH (sector:Sector)<-[:BELONGS_TO]-(article:Article)
-OPTIONAL MATCH (article)-[:LINKED_TO]->(controversy:Controversy)
+OPTIONAL MATCH (sector)-[:PART_OF]->(activity:Activity)
+WITH canonicalized, activity, sector, article
+WHERE activity IS NOT NULL OR NOT canonicalized
 OPTIONAL MATCH (article)-[:LEADS_TO]->(perf:Company_Performance)
+WITH coalesce(activity.name, sector.sector_name) AS activity, sector, COUNT(DISTINCT article) AS nb_articles, MIN(perf.diff_2_months) AS min_perf
+WITH activity, SUM(nb_articles) AS nb_articles, MIN(min_perf) AS min_perf
+WITH COLLECT({activity: activity, nb_articles: nb_articles, min_perf: min_perf}) AS rows, SUM(nb_articles) AS total
+UNWIND rows AS row
+WITH CASE WHEN row.nb_articles * 100.0 / total <= 1 THEN "Other" ELSE row.activity END AS activity, row, total
+WITH activity, total, SUM(row.nb_articles) AS number_of_articles, MIN(row.min_perf) AS min_perf_diff_2_months
 RETURN 
-    sector.sector_name AS sector_name, 
-    COUNT(DISTINCT article) AS number_of_articles,
-    MIN(perf.diff_2_months) AS min_perf_diff_2_months
+    activity, 
+    number_of_articles,
+    number_of_articles * 100.0 / total AS percentage,
+    min_perf_diff_2_months
+ORDER BY activity
 """
 
 controversy_repartition = """
 MATCH (sector:Sector)<-[:BELONGS_TO]-(article:Article)-[:LINKED_TO]->(controversy:Controversy)
-WHERE sector.sector_name = "{sector}"
-RETURN controversy.name AS controversy_name, 
-       COUNT(article) AS number_of_articles
+WHERE sector.sector_name = $sector
+WITH coalesce(controversy.canonical_name, controversy.name) AS controversy_name, COUNT(article) AS nb_articles
+WITH COLLECT({controversy_name: controversy_name, nb_articles: nb_articles}) AS rows, SUM(nb_articles) AS total
+UNWIND rows AS row
+WITH CASE WHEN row.nb_articles * 100.0 / total <= 5 THEN "Other" ELSE row.controversy_name END AS controversy_name, row, total
+WITH controversy_name, total, SUM(row.nb_articles) AS number_of_articles
+RETURN controversy_name, 
+       number_of_articles,
+       number_of_articles * 100.0 / total AS percentage
+ORDER BY controversy_name
 """
 
 financial_impact_by_controversy_per_sector = """
 MATCH (sector:Sector)<-[:BELONGS_TO]-(article:Article)-[:LINKED_TO]->(controversy:Controversy)
 MATCH (article)-[:LEADS_TO]->(perf:Company_Performance)
-WHERE sector.sector_name = "{sector}"
-RETURN perf.diff_2_months AS perf, controversy.name AS controversy, sector.sector_name AS sector
+WHERE sector.sector_name = $sector
+RETURN coalesce(controversy.canonical_name, controversy.name) AS controversy, sector.sector_name AS sector, MIN(perf.diff_2_months) AS perf
+ORDER BY controversy
 """
 
 articles_for_sector_controversy = """
 MATCH (sector:Sector)<-[:BELONGS_TO]-(article:Article)-[:LINKED_TO]->(controversy:Controversy)
-WHERE sector.sector_name = '{sector}'
+WHERE sector.sector_name = $sector
 OPTIONAL MATCH (article)-[:MENTIONS]->(company:Company)
 OPTIONAL MATCH (article)-[:LEADS_TO]->(perf:Company_Performance)
-RETURN article, perf.diff_2_months AS perf_2, perf.diff_1_month AS perf_1 , controversy.name AS controversy, company.company_name AS company
+RETURN article, perf.diff_2_months AS perf_2, perf.diff_1_month AS perf_1 , coalesce(controversy.canonical_name, controversy.name) AS controversy, company.company_name AS company
+"""
+
+# Full-text index created at ingest time by src/backend/indexes.py, matches articles by name
+# and articles mentioning a matching company. Both the index hits and the articles expanded from
+# each company are capped at $candidates, the filters only run on these candidates.
+search_articles = """
+CALL db.index.fulltext.queryNodes("article_search", $search, {limit: $candidates}) YIELD node, score
+CALL {
+    WITH node
+    WITH node WHERE node:Article
+    RETURN node AS article
+    UNION
+    WITH node
+    MATCH (node)<-[:MENTIONS]-(article:Article)
+    RETURN article LIMIT $candidates
+}
+WITH article, MAX(score) AS score
+WHERE ($sector IS NULL OR EXISTS { (article)-[:BELONGS_TO]->(:Sector {sector_name: $sector}) })
+  AND ($controversy IS NULL OR EXISTS { (article)-[:LINKED_TO]->(c:Controversy) WHERE coalesce(c.canonical_name, c.name) = $controversy })
+WITH article, score
+ORDER BY score DESC
+LIMIT $limit
+OPTIONAL MATCH (article)-[:LEADS_TO]->(perf:Company_Performance)
+WITH article, score, MIN(perf.diff_1_month) AS perf_1, MIN(perf.diff_2_months) AS perf_2
+RETURN article.name AS name, article.url AS url, article.date AS date, score,
+       [(article)-[:LINKED_TO]->(c:Controversy) | coalesce(c.canonical_name, c.name)] AS controversies,
+       perf_1, perf_2
+ORDER BY score DESC
+"""
+
+controversies_list = """
+MATCH (controversy:Controversy)
+RETURN DISTINCT coalesce(controversy.canonical_name, controversy.name) AS controversy
+ORDER BY controversy
 """
 
+SEARCH_CANDIDATES_FACTOR = 10  # Index hits and articles per company considered, as a multiple of the search limit
+
+LUCENE_SPECIAL_CHARACTERS = set('+-&|!(){}[]^"~*?:\\/')
+
 def get_nb_controversies_per_activity(session:Session):
         
     result = session.run(query = overview_data)
@@ -72,31 +127,17 @@ def get_nb_controversies_per_activity(session:Session):
     if len(records) == 0:
         return None
     data = pd.DataFrame(records)
-    data["activity"] = data["sector_name"].apply(lambda x: mapping_sectors.get(x, x))
-    data= data[data["activity"] != ""]
-    # Group by activity summing the number of articles and min of min_perf_diff_2_months
-    agg_data = data.groupby("activity",as_index=False).agg({"number_of_articles": "sum", "min_perf_diff_2_months": "min"}).reset_index()
-    agg_data["percentage"] = agg_data["number_of_articles"] / agg_data["number_of_articles"].sum() * 100
-    agg_data.loc[agg_data["percentage"] <= 1, "activity"] = "Other"
-    agg_data = agg_data.sort_values("percentage", ascending=False)
-    agg_data = agg_data.groupby("activity").agg({"number_of_articles": "sum", "percentage": "sum", "min_perf_diff_2_months": "min"}).reset_index()
-    return agg_data[["activity","number_of_articles","percentage","min_perf_diff_2_months"]]
+    return data[["activity","number_of_articles","percentage","min_perf_diff_2_months"]]
 
 
 def get_data_for_risk_repartition(session:Session,sector:str):
     
 
-    result = session.run(query = controversy_repartition.format(sector=sector))
+    result = session.run(query = controversy_repartition, sector=sector)
     records = result.data()
     if len(records) == 0:
         return None
     data = pd.DataFrame(records)
-    data["controversy_name"] = data["controversy_name"].apply(lambda x: mapping_controversies.get(x, x))
-    data = data.groupby("controversy_name").sum().reset_index()
-    data["percentage"] = data["number_of_articles"] / data["number_of_articles"].sum() * 100
-    data = data.sort_values("percentage", ascending=False)
-    data.loc[data["percentage"] <= 5, "controversy_name"] = "Other"
-    data = data.groupby("controversy_name").sum().reset_index()
     return data
 
 def get_data_nb_controverties_distrib(session:Session):
@@ -110,33 +151,49 @@ def get_data_nb_controverties_distrib(session:Session):
 
 def get_data_financial_impact_by_controversy_per_sector(session:Session,sector:str):
     
-    result = session.run(query = financial_impact_by_controversy_per_sector.format(sector=sector))
+    result = session.run(query = financial_impact_by_controversy_per_sector, sector=sector)
     records = result.data()
     if len(records) == 0:
         return None
     data = pd.DataFrame(records)
-    data["controversy"] = data["controversy"].apply(lambda x: mapping_controversies.get(x, x))
-    return data.groupby(["controversy","sector"]).min().reset_index()
+    return data[["controversy","sector","perf"]]
 
 def get_articles_for_sector_controversy(session:Session,sector:str):
     
-    try:
-        result = session.run(query = articles_for_sector_controversy.format(sector=sector))
-        records = result.data()
-
-        if len(records) == 0:
-            return None
-        data = pd.DataFrame(records)
-        data["controversy"] = data["controversy"].apply(lambda x: mapping_controversies.get(x, x))
-        data["date"] = data["article"].apply(lambda x: x.get("date"))
-        data["url"] = data["article"].apply(lambda x: x.get("url"))
-        # Remove duplicates
-        data.drop_duplicates(subset=["url","controversy"], inplace=True)
-        data.sort_values(["date"], inplace=True, ascending=False)
-        return data
-    except Exception as e:
-        print(e)
+    result = session.run(query = articles_for_sector_controversy, sector=sector)
+    records = result.data()
+
+    if len(records) == 0:
         return None
+    data = pd.DataFrame(records)
+    data["date"] = data["article"].apply(lambda x: x.get("date"))
+    data["url"] = data["article"].apply(lambda x: x.get("url"))
+    # Remove duplicates
+    data.drop_duplicates(subset=["url","controversy"], inplace=True)
+    data.sort_values(["date"], inplace=True, ascending=False)
+    return data
         
+def escape_search_text(text:str):
+    # Escape the Lucene query syntax so that the user's text is searched as plain keywords
+    return "".join(f"\\{char}" if char in LUCENE_SPECIAL_CHARACTERS else char for char in text)
+
+def search_articles_by_keyword(session:Session,text:str,sector:str|None=None,controversy:str|None=None,limit:int=20):
+    
+    # Lowercased so that AND, OR and NOT are searched as words, the index being case-insensitive
+    search = escape_search_text(text.lower()).strip()
+    if not search:
+        return None
+    result = session.run(query = search_articles, search=search, sector=sector, controversy=controversy, limit=limit, candidates=limit * SEARCH_CANDIDATES_FACTOR)
+    records = result.data()
+    if len(records) == 0:
+        return None
+    data = pd.DataFrame(records)
+    data["controversies"] = data["controversies"].apply(lambda x: ", ".join(sorted(set(x))))
+    return data
+
+def get_controversies_list(session:Session):
+
+    result = session.run(query = controversies_list)
+    return [record["controversy"] for record in result.data()]
+
 # get_articles_for_sector_controversy(driver.session(),sector="Extraction de minerais métalliques",controversy = "Environmental Controversies").to_csv("result_backend_articles.csv",index=False)
-print(get_nb_controversies_per_activity(driver.session()))
@@ -0,0 +1,200 @@
+import csv
+import hashlib
+import json
+import os
+from tqdm import tqdm
+
+from src.backend.graph_keys import node_key
+
+
+def node_id(key):
+    """
+    Builds a stable id for a node from its key, independent of the order of the input data.
+
+    Args:
+        key (tuple): Node key, as returned by node_key.
+    Returns:
+        str: Id of the form 'Label:<hash>'.
+    """
+    digest = hashlib.sha1(json.dumps(key[1:], ensure_ascii=False).encode("utf-8")).hexdigest()
+    return f"{key[0]}:{digest[:20]}"
+
+
+def export_bulk_import(data, output_dir):
+    """
+    Exports nodes and relationships as header-annotated CSV files for the offline neo4j-admin importer.
+    Writes one file per label and one per relationship type. Nodes are deduplicated on their key and
+    the properties of duplicates are merged as the MERGE ingest does with SET n += properties: the
+    last value wins and a null value removes the property. The id column is unnamed, so the ids are
+    only used to link the relationships and are not stored on the nodes. Relationships are
+    deduplicated on their endpoints, type and properties, and dropped when an endpoint is not among
+    the nodes.
+
+    Args:
+        data (dict): Data, as written by csv_to_json.
+        output_dir (str): Directory where the CSV files will be saved.
+    Returns:
+        dict: Mapping of 'nodes' and 'relationships' to the list of written file paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Deduplicate nodes per label
+    nodes_per_label = {}
+    for node in tqdm(data.get("nodes", [])):
+        label = node.get("label")
+        properties = node.get("properties", {})
+        key = node_key(label, properties)
+        if key is None:
+            continue
+        merged = nodes_per_label.setdefault(label, {}).setdefault(node_id(key), {})
+        for name, value in properties.items():
+            if value is None:
+                merged.pop(name, None)
+            else:
+                merged[name] = value
+
+    # Deduplicate relationships per type, keeping only those between known nodes
+    relationships_per_type = {}
+    dropped = 0
+    for rel in tqdm(data.get("relationships", [])):
+        start_node = rel.get("start_node")
+        end_node = rel.get("end_node")
+        start_key = node_key(start_node["label"], start_node["match_criteria"])
+        end_key = node_key(end_node["label"], end_node["match_criteria"])
+        if start_key is None or end_key is None:
+            dropped += 1
+            continue
+        start_id = node_id(start_key)
+        end_id = node_id(end_key)
+        if start_id not in nodes_per_label.get(start_key[0], {}) or end_id not in nodes_per_label.get(end_key[0], {}):
+            dropped += 1
+            continue
+        properties = rel.get("properties", {})
+        rel_key = (start_id, end_id, json.dumps(properties, sort_keys=True, ensure_ascii=False))
+        relationships_per_type.setdefault(rel.get("type"), {})[rel_key] = properties
+
+    written = {"nodes": [], "relationships": []}
+
+    for label, nodes in sorted(nodes_per_label.items()):
+        columns = sorted({name for properties in nodes.values() for name in properties})
+        path = os.path.join(output_dir, f"nodes_{label}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow([":ID", *columns, ":LABEL"])
+            for identifier in sorted(nodes):
+                properties = nodes[identifier]
+                writer.writerow([identifier, *(format_value(properties.get(name)) for name in columns), label])
+        written["nodes"].append(path)
+
+    for rel_type, relationships in sorted(relationships_per_type.items()):
+        columns = sorted({name for properties in relationships.values() for name in properties})
+        path = os.path.join(output_dir, f"relationships_{rel_type}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow([":START_ID", ":END_ID", *columns, ":TYPE"])
+            for (start_id, end_id, _), properties in sorted(relationships.items()):
+                writer.writerow([start_id, end_id, *(format_value(properties.get(name)) for name in columns), rel_type])
+        written["relationships"].append(path)
+
+    print(f"Total nodes: {sum(len(nodes) for nodes in nodes_per_label.values())}")
+    print(f"Total relationships: {sum(len(rels) for rels in relationships_per_type.values())}")
+    print(f"Dropped relationships with unknown endpoints: {dropped}")
+    return written
+
+
+def format_value(value):
+    """
+    Formats a property value for the importer: missing values are left empty and are not set.
+
+    Args:
+        value: Property value.
+    Returns:
+        str: Formatted value.
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return str(value)
+
+
+def verify_bulk_import(written):
+    """
+    Checks the format and referential integrity of the exported files: node files have an :ID and
+    a :LABEL column with unique ids, relationship files have :START_ID, :END_ID and :TYPE columns
+    and only reference ids present in the node files.
+
+    Args:
+        written (dict): Mapping of 'nodes' and 'relationships' to file paths, as returned by export_bulk_import.
+    Returns:
+        list: Description of each problem found, empty if the files are valid.
+    """
+    errors = []
+    ids = set()
+
+    for path in written.get("nodes", []):
+        with open(path, newline="", encoding="utf-8") as csvfile:
+            reader = csv.reader(csvfile)
+            header = next(reader, [])
+            if not header or header[0] != ":ID" or header[-1] != ":LABEL":
+                errors.append(f"{path}: invalid header {header}")
+                continue
+            for line, row in enumerate(reader, start=2):
+                if len(row) != len(header):
+                    errors.append(f"{path}:{line}: expected {len(header)} fields, got {len(row)}")
+                elif row[0] in ids:
+                    errors.append(f"{path}:{line}: duplicate id {row[0]}")
+                else:
+                    ids.add(row[0])
+
+    for path in written.get("relationships", []):
+        with open(path, newline="", encoding="utf-8") as csvfile:
+            reader = csv.reader(csvfile)
+            header = next(reader, [])
+            if header[:2] != [":START_ID", ":END_ID"] or header[-1:] != [":TYPE"]:
+                errors.append(f"{path}: invalid header {header}")
+                continue
+            for line, row in enumerate(reader, start=2):
+                if len(row) != len(header):
+                    errors.append(f"{path}:{line}: expected {len(header)} fields, got {len(row)}")
+                    continue
+                for identifier in row[:2]:
+                    if identifier not in ids:
+                        errors.append(f"{path}:{line}: unknown node id {identifier}")
+
+    return errors
+
+
+def import_command(written, database="neo4j"):
+    """
+    Builds the neo4j-admin command loading the exported files into an empty database.
+
+    Args:
+        written (dict): Mapping of 'nodes' and 'relationships' to file paths, as returned by export_bulk_import.
+        database (str): Name of the database to create.
+    Returns:
+        str: The command.
+    """
+    nodes = " ".join(f"--nodes={path}" for path in written["nodes"])
+    relationships = " ".join(f"--relationships={path}" for path in written["relationships"])
+    return f"neo4j-admin database import full {nodes} {relationships} --multiline-fields=true {database}"
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Export data as CSV files for the offline neo4j-admin importer.")
+    parser.add_argument("data", nargs="?", default="data.json", help="Path to the JSON data file.")
+    parser.add_argument("output_dir", nargs="?", default="import", help="Directory where the CSV files will be saved.")
+    args = parser.parse_args()
+
+    with open(args.data) as f:
+        data = json.load(f)
+
+    written = export_bulk_import(data, args.output_dir)
+    errors = verify_bulk_import(written)
+    for error in errors:
+        print(error)
+    if errors:
+        sys.exit(1)
+    print(import_command(written))
+    print("Then apply the controversy and sector mappings and create the indexes with: python -m src.backend.canonicalize")
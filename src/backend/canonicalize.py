@@ -0,0 +1,100 @@
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+import os
+import json
+
+from src.backend.indexes import create_indexes
+
+load_dotenv()
+
+NEO4J_URI = os.environ.get("NEO4J_URI")
+NEO4J_USERNAME = os.environ.get("NEO4J_USERNAME")
+NEO4J_PASSWORD = os.environ.get("NEO4J_PASSWORD")
+
+MAPPING_CONTROVERSIES_PATH = "src/data_backend/mapping_controversies.json"
+MAPPING_SECTORS_PATH = "src/data_backend/sectors_mapping.json"
+
+
+def load_mappings(controversies_path=MAPPING_CONTROVERSIES_PATH, sectors_path=MAPPING_SECTORS_PATH):
+    """
+    Loads the controversy and sector mapping files.
+
+    Args:
+        controversies_path (str): Path to the mapping of controversy names to canonical names.
+        sectors_path (str): Path to the mapping of sector names to activities.
+    Returns:
+        tuple: (mapping_controversies, mapping_sectors)
+    """
+    with open(controversies_path, "r") as f:
+        mapping_controversies = json.load(f)
+    with open(sectors_path, "r") as f:
+        mapping_sectors = json.load(f)
+    return mapping_controversies, mapping_sectors
+
+
+def canonicalize_controversies(tx, mapping_controversies):
+    """
+    Sets the canonical_name of every Controversy node. Names absent from the mapping are their own
+    canonical name, so the whole graph is rewritten and the function can be rerun after the mapping changes.
+
+    Args:
+        tx: Neo4j transaction.
+        mapping_controversies (dict): Mapping of controversy names to canonical names.
+    """
+    tx.run("MATCH (c:Controversy) SET c.canonical_name = c.name")
+    tx.run(
+        "UNWIND keys($mapping) AS name "
+        "MATCH (c:Controversy {name: name}) "
+        "SET c.canonical_name = $mapping[name]",
+        mapping=mapping_controversies,
+    )
+
+
+def link_sectors_to_activities(tx, mapping_sectors):
+    """
+    Links every Sector node to an Activity node with a PART_OF relationship. Sectors absent from the
+    mapping are their own activity and sectors mapped to an empty string are left out. Existing links
+    and orphaned activities are removed first, so the function can be rerun after the mapping changes.
+
+    Args:
+        tx: Neo4j transaction.
+        mapping_sectors (dict): Mapping of sector names to activities.
+    """
+    tx.run("MATCH (:Sector)-[r:PART_OF]->(:Activity) DELETE r")
+    tx.run(
+        "MATCH (s:Sector) "
+        "WITH s, coalesce($mapping[s.sector_name], s.sector_name) AS activity "
+        "WHERE activity <> '' "
+        "MERGE (a:Activity {name: activity}) "
+        "MERGE (s)-[:PART_OF]->(a)",
+        mapping=mapping_sectors,
+    )
+    tx.run("MATCH (a:Activity) WHERE NOT (a)<-[:PART_OF]-(:Sector) DELETE a")
+
+
+def canonicalize_graph(session, mapping_controversies=None, mapping_sectors=None):
+    """
+    Applies the controversy and sector mappings inside the graph, loading the mapping files when
+    the mappings are not given.
+
+    Args:
+        session: Neo4j session.
+        mapping_controversies (dict): Mapping of controversy names to canonical names.
+        mapping_sectors (dict): Mapping of sector names to activities.
+    """
+    if mapping_controversies is None or mapping_sectors is None:
+        loaded_controversies, loaded_sectors = load_mappings()
+        mapping_controversies = loaded_controversies if mapping_controversies is None else mapping_controversies
+        mapping_sectors = loaded_sectors if mapping_sectors is None else mapping_sectors
+
+    session.execute_write(canonicalize_controversies, mapping_controversies)
+    session.execute_write(link_sectors_to_activities, mapping_sectors)
+
+
+if __name__ == "__main__":
+    with GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD)) as driver:
+        with driver.session() as session:
+            print("Canonicalizing controversies and activities...")
+            canonicalize_graph(session)
+            print("Creating indexes...")
+            create_indexes(session)
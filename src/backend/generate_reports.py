@@ -0,0 +1,127 @@
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+from tqdm import tqdm
+
+from src.backend.backend import (
+    driver,
+    sectors_list,
+    get_data_for_risk_repartition,
+    get_data_financial_impact_by_controversy_per_sector,
+    get_articles_for_sector_controversy,
+)
+
+MAX_WORKERS = 8  # Number of sectors computed concurrently, bounded by the driver's connection pool
+TOP_ARTICLES = 10  # Number of articles kept per sector, as displayed in the dashboard
+
+
+def get_top_articles(session, sector):
+    """
+    Retrieves the articles linked to the largest stock drops of a sector, as displayed in the dashboard.
+
+    Args:
+        session: Neo4j session.
+        sector (str): Name of the sector.
+    Returns:
+        pd.DataFrame: Top articles, or None if the sector has no articles.
+    """
+    data = get_articles_for_sector_controversy(session, sector)
+    if data is None or data.empty:
+        return None
+    data["name"] = data["article"].apply(lambda x: x.get("name"))
+    data = data[["name", "url", "date", "controversy", "company", "perf_1", "perf_2"]]
+    return data.sort_values("perf_1", ascending=True).head(TOP_ARTICLES)
+
+
+DATASETS = {
+    "risk_repartition": get_data_for_risk_repartition,
+    "financial_impact": get_data_financial_impact_by_controversy_per_sector,
+    "top_articles": get_top_articles,
+}
+
+
+def compute_sector(sector):
+    """
+    Computes every dataset of a sector in its own session, the driver's connection pool being shared.
+
+    Args:
+        sector (str): Name of the sector.
+    Returns:
+        tuple: (datasets, summary) where datasets maps each dataset name to a DataFrame or None,
+            and summary holds the row counts, the time spent and the error, if any.
+    """
+    start = time.perf_counter()
+    datasets = {}
+    summary = {"sector": sector, "error": None}
+    try:
+        with driver.session() as session:
+            for name, function in DATASETS.items():
+                datasets[name] = function(session, sector)
+                summary[f"{name}_rows"] = 0 if datasets[name] is None else len(datasets[name])
+    except Exception as e:
+        summary["error"] = str(e)
+    summary["seconds"] = time.perf_counter() - start
+    return datasets, summary
+
+
+def generate_reports(sectors, output_dir, max_workers=MAX_WORKERS):
+    """
+    Computes the dashboard datasets of every sector concurrently and writes them as Parquet files,
+    one file per dataset with a 'sector' column, along with a summary of the time spent per sector.
+
+    Args:
+        sectors (list): Names of the sectors.
+        output_dir (str): Directory where the files will be saved.
+        max_workers (int): Maximum number of sectors computed at the same time.
+    Returns:
+        pd.DataFrame: Summary with one row per sector.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    frames = {name: [] for name in DATASETS}
+    summaries = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(compute_sector, sector) for sector in sectors]
+        for future in tqdm(as_completed(futures), total=len(futures)):
+            datasets, summary = future.result()
+            summaries.append(summary)
+            for name, data in datasets.items():
+                if data is not None and not data.empty:
+                    frames[name].append(data.assign(sector=summary["sector"]))
+
+    for name, data in frames.items():
+        if data:
+            pd.concat(data, ignore_index=True).to_parquet(os.path.join(output_dir, f"{name}.parquet"), index=False)
+
+    wall_time = time.perf_counter() - start
+    summary = pd.DataFrame(summaries).sort_values("seconds", ascending=False)
+    summary.to_csv(os.path.join(output_dir, "summary.csv"), index=False)
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "sectors": len(sectors),
+            "failed_sectors": int(summary["error"].notna().sum()),
+            "max_workers": max_workers,
+            "wall_time_seconds": wall_time,
+            "sum_sector_seconds": float(summary["seconds"].sum()),
+        }, f, indent=4)
+
+    print(summary.to_markdown(index=False))
+    print(f"Total wall time: {wall_time:.2f}s for {len(sectors)} sectors ({max_workers} workers)")
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate the sector dashboard datasets for every sector.")
+    parser.add_argument("output_dir", nargs="?", default="reports", help="Directory where the files will be saved.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Maximum number of sectors computed at the same time.")
+    args = parser.parse_args()
+
+    try:
+        generate_reports(sectors_list, args.output_dir, max_workers=args.workers)
+    finally:
+        driver.close()
@@ -0,0 +1,73 @@
+# Properties identifying each label's nodes, as used in the relationships' match_criteria.
+# Labels not listed here are identified by all of their properties.
+NODE_KEYS = {
+    "Company": ("name",),
+    "Sector": ("sector_name",),
+    "Controversy": ("name",),
+    "Article": ("url",),
+}
+
+
+def merge_keys(label, properties):
+    """
+    Returns the properties a node is merged on: the label's key properties, or all of its
+    properties when the label has no key or a key property is missing.
+
+    Args:
+        label (str): Label of the node.
+        properties (dict): Properties of the node.
+    Returns:
+        tuple: Names of the properties to merge on.
+    """
+    keys = NODE_KEYS.get(label)
+    if keys is None or any(key not in properties for key in keys):
+        return tuple(sorted(properties.keys()))
+    return keys
+
+
+def node_key(label, properties):
+    """
+    Builds the key identifying a node in the element id map.
+
+    Args:
+        label (str): Label of the node.
+        properties (dict): Properties of the node, or the match_criteria of a relationship endpoint.
+    Returns:
+        tuple: (label, value, ...) for the label's key properties, or None if a key property is missing.
+    """
+    keys = NODE_KEYS.get(label) or tuple(sorted(properties.keys()))
+    if any(key not in properties for key in keys):
+        return None
+    return (label, *(properties[key] for key in keys))
+
+
+def resolve_relationships(relationships_batch, id_map):
+    """
+    Resolves the endpoints of a batch of relationships with the element id map.
+
+    Args:
+        relationships_batch (list): List of relationship data dictionaries.
+        id_map (dict): Mapping of node key to element id, as returned by create_nodes_batch_with_ids.
+    Returns:
+        tuple: (resolved, unresolved) where resolved is a list of dictionaries with 'type', 'start_id',
+            'end_id', 'properties' and the original 'relationship', and unresolved the relationships
+            whose endpoints are not in the map.
+    """
+    resolved = []
+    unresolved = []
+    for rel_data in relationships_batch:
+        start_node = rel_data.get("start_node")
+        end_node = rel_data.get("end_node")
+        start_id = id_map.get(node_key(start_node["label"], start_node["match_criteria"]))
+        end_id = id_map.get(node_key(end_node["label"], end_node["match_criteria"]))
+        if start_id is None or end_id is None:
+            unresolved.append(rel_data)
+            continue
+        resolved.append({
+            "type": rel_data.get("type"),
+            "start_id": start_id,
+            "end_id": end_id,
+            "properties": rel_data.get("properties", {}),
+            "relationship": rel_data,
+        })
+    return resolved, unresolved
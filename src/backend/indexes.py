@@ -0,0 +1,38 @@
+from neo4j import GraphDatabase
+from dotenv import load_dotenv
+import os
+
+load_dotenv()
+
+NEO4J_URI = os.environ.get("NEO4J_URI")
+NEO4J_USERNAME = os.environ.get("NEO4J_USERNAME")
+NEO4J_PASSWORD = os.environ.get("NEO4J_PASSWORD")
+
+INDEX_TIMEOUT = 300  # Seconds to wait for the indexes to come online
+
+# Indexes queried by the dashboard
+INDEXES = [
+    "CREATE INDEX activity_name IF NOT EXISTS FOR (a:Activity) ON (a.name)",
+    # Full-text index of the article search, over the names of the articles and of the companies they mention
+    "CREATE FULLTEXT INDEX article_search IF NOT EXISTS FOR (n:Article|Company) ON EACH [n.name, n.company_name]",
+]
+
+
+def create_indexes(session, timeout=INDEX_TIMEOUT):
+    """
+    Creates the indexes queried by the dashboard and waits for them to come online.
+
+    Args:
+        session: Neo4j session.
+        timeout (int): Seconds to wait for the indexes to come online.
+    """
+    for query in INDEXES:
+        session.run(query).consume()
+    session.run("CALL db.awaitIndexes($timeout)", timeout=timeout).consume()
+
+
+if __name__ == "__main__":
+    with GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD)) as driver:
+        with driver.session() as session:
+            print("Creating indexes...")
+            create_indexes(session)
@@ -0,0 +1,173 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from neo4j import GraphDatabase
+import pandas as pd
+
+from src.backend.backend import (
+    NEO4J_URI,
+    NEO4J_USERNAME,
+    NEO4J_PASSWORD,
+    sectors_list,
+    get_nb_controversies_per_activity,
+    get_data_for_risk_repartition,
+    get_data_nb_controverties_distrib,
+    get_data_financial_impact_by_controversy_per_sector,
+    get_articles_for_sector_controversy,
+    get_controversies_list,
+    search_articles_by_keyword,
+)
+
+# Functions called by one run of app.py, in the same order, with whether they take the selected
+# sector as argument. Streamlit reruns the whole script on every widget change and st.tabs runs
+# the body of every tab, so each page load calls all of them, the Overview included.
+PAGE_FUNCTIONS = [
+    (get_nb_controversies_per_activity, False),
+    (get_data_for_risk_repartition, True),
+    (get_data_nb_controverties_distrib, False),
+    (get_data_financial_impact_by_controversy_per_sector, True),
+    (get_articles_for_sector_controversy, True),
+    (get_controversies_list, False),
+]
+
+
+def virtual_user(driver, sectors, nb_sectors, think_time, seed, latencies, lock, search_text=None):
+    """
+    Simulates an analyst: opens the dashboard, which selects the first sector, then selects random
+    sectors one after the other. Each page load makes the calls of a full run of app.py, including
+    the keyword search when the user has typed a search text, which is kept across reruns.
+
+    Args:
+        driver: Neo4j driver shared by the virtual users.
+        sectors (list): Names of the sectors to pick from, the first one being selected on opening.
+        nb_sectors (int): Number of sectors selected by the user after opening the dashboard.
+        think_time (float): Pause in seconds between two page loads.
+        seed (int): Seed of the user's random sector choices.
+        latencies (list): List receiving a (function, seconds, error) tuple per call.
+        lock (threading.Lock): Lock protecting latencies.
+        search_text (str): Text typed in the search tab, or None if the user does not search.
+    """
+    rng = random.Random(seed)
+
+    def timed(function, *args):
+        start = time.perf_counter()
+        error = None
+        try:
+            function(session, *args)
+        except Exception as e:
+            error = str(e)
+        with lock:
+            latencies.append((function.__name__, time.perf_counter() - start, error))
+
+    def load_page(sector):
+        for function, takes_sector in PAGE_FUNCTIONS:
+            if takes_sector:
+                timed(function, sector)
+            else:
+                timed(function)
+        if search_text and search_text.strip():
+            timed(search_articles_by_keyword, search_text)
+
+    with driver.session() as session:
+        load_page(sectors[0])
+        for _ in range(nb_sectors):
+            time.sleep(think_time)
+            load_page(rng.choice(sectors))
+
+
+def run_level(driver, nb_users, sectors, nb_sectors, think_time, seed, search_text=None):
+    """
+    Runs nb_users virtual users concurrently and aggregates their latencies per function.
+
+    Args:
+        driver: Neo4j driver shared by the virtual users.
+        nb_users (int): Number of concurrent virtual users.
+        sectors (list): Names of the sectors to pick from.
+        nb_sectors (int): Number of sectors selected by each user after opening the dashboard.
+        think_time (float): Pause in seconds between two page loads.
+        seed (int): Seed of the random sector choices.
+        search_text (str): Text typed in the search tab by every user, or None if they do not search.
+    Returns:
+        pd.DataFrame: One row per function with the number of calls and errors, the throughput
+            and the p50/p95/p99 latencies in milliseconds.
+    """
+    latencies = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=nb_users) as executor:
+        futures = [
+            executor.submit(virtual_user, driver, sectors, nb_sectors, think_time, seed + user, latencies, lock, search_text)
+            for user in range(nb_users)
+        ]
+        for future in futures:
+            future.result()
+    wall_time = time.perf_counter() - start
+
+    data = pd.DataFrame(latencies, columns=["function", "seconds", "error"])
+    data["ms"] = data["seconds"] * 1000
+    stats = data.groupby("function").agg(
+        calls=("ms", "size"),
+        errors=("error", "count"),
+        p50_ms=("ms", lambda x: x.quantile(0.50)),
+        p95_ms=("ms", lambda x: x.quantile(0.95)),
+        p99_ms=("ms", lambda x: x.quantile(0.99)),
+    ).reset_index()
+    stats["calls_per_second"] = stats["calls"] / wall_time
+    total = pd.DataFrame([{
+        "function": "all",
+        "calls": len(data),
+        "errors": int(data["error"].count()),
+        "p50_ms": data["ms"].quantile(0.50),
+        "p95_ms": data["ms"].quantile(0.95),
+        "p99_ms": data["ms"].quantile(0.99),
+        "calls_per_second": len(data) / wall_time,
+    }])
+    stats = pd.concat([stats, total], ignore_index=True)
+    stats.insert(0, "users", nb_users)
+    return stats
+
+
+def load_test(uri, auth, levels, sectors, nb_sectors=3, think_time=0.0, seed=0, search_text=None):
+    """
+    Runs the load test at increasing numbers of concurrent virtual users against the given database,
+    e.g. a local Neo4j loaded from a snapshot or with the offline importer.
+
+    Args:
+        uri (str): URI for the Neo4j database.
+        auth (tuple): A tuple of (username, password) for database authentication.
+        levels (list): Numbers of concurrent virtual users, run one after the other.
+        sectors (list): Names of the sectors to pick from.
+        nb_sectors (int): Number of sectors selected by each user after opening the dashboard.
+        think_time (float): Pause in seconds between two page loads.
+        seed (int): Seed of the random sector choices.
+        search_text (str): Text typed in the search tab by every user, or None if they do not search.
+    Returns:
+        pd.DataFrame: Results of every level.
+    """
+    results = []
+    with GraphDatabase.driver(uri, auth=auth, max_connection_pool_size=max(levels)) as driver:
+        driver.verify_connectivity()
+        for nb_users in sorted(levels):
+            stats = run_level(driver, nb_users, sectors, nb_sectors, think_time, seed, search_text)
+            print(stats.to_markdown(index=False, floatfmt=".1f"))
+            results.append(stats)
+    return pd.concat(results, ignore_index=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load test the dashboard backend with concurrent virtual users.")
+    parser.add_argument("--uri", default=NEO4J_URI, help="URI of the Neo4j database, defaults to NEO4J_URI.")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 5, 10, 20, 50], help="Numbers of concurrent virtual users.")
+    parser.add_argument("--sectors", type=int, default=3, help="Number of sectors selected by each user after opening the dashboard.")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause in seconds between two page loads.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random sector choices.")
+    parser.add_argument("--search", help="Optional text typed in the search tab by every user.")
+    parser.add_argument("--output", help="Optional CSV file where the results will be saved.")
+    args = parser.parse_args()
+
+    results = load_test(args.uri, (NEO4J_USERNAME, NEO4J_PASSWORD), args.users, sectors_list, args.sectors, args.think_time, args.seed, args.search)
+    if args.output:
+        results.to_csv(args.output, index=False)
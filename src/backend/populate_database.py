@@ -3,6 +3,10 @@ from dotenv import load_dotenv
 import os
 from tqdm import tqdm
 
+from src.backend.canonicalize import canonicalize_graph
+from src.backend.indexes import create_indexes
+from src.backend.graph_keys import merge_keys
+
 load_dotenv()
 
 NEO4J_URI = os.environ.get("NEO4J_URI")
@@ -33,12 +37,21 @@ def insert_data_from_json(data, uri, auth):
                 print("Inserting relationships...")
                 for relationship in tqdm(data.get("relationships", [])):
                     session.execute_write(create_relationship, relationship)
+
+                # Apply the controversy and sector mappings inside the graph
+                print("Canonicalizing controversies and activities...")
+                canonicalize_graph(session)
+
+                # Create the indexes queried by the dashboard
+                print("Creating indexes...")
+                create_indexes(session)
     except Exception as e:
         print(f"An error occurred: {e}")
 
 def create_node(tx, node_data):
     """
-    Creates a node in the database.
+    Creates a node in the database. The node is merged on its key properties (see merge_keys)
+    and its other properties are set, as in the batched ingest.
     
     Args:
         tx: Neo4j transaction.
@@ -48,9 +61,9 @@ def create_node(tx, node_data):
         label = node_data.get("label")
         properties = node_data.get("properties", {})
         
-        prop_str = ", ".join(f"{key}: ${key}" for key in properties.keys())
-        query = f"MERGE (n:{label} {{{prop_str}}})"
-        tx.run(query, **properties)
+        prop_str = ", ".join(f"{key}: $properties.{key}" for key in merge_keys(label, properties))
+        query = f"MERGE (n:{label} {{{prop_str}}}) SET n += $properties"
+        tx.run(query, properties=properties)
     except Exception as e:
         print(f"An error occurred while creating node: {e}")
 
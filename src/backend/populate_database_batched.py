@@ -1,9 +1,16 @@
 from neo4j import GraphDatabase
+from neo4j.exceptions import ServiceUnavailable, SessionExpired
 from dotenv import load_dotenv
 import os
+import json
+from datetime import datetime
 from tqdm import tqdm
 from itertools import islice
 
+from src.backend.canonicalize import canonicalize_graph
+from src.backend.indexes import create_indexes
+from src.backend.graph_keys import merge_keys, node_key, resolve_relationships
+
 load_dotenv()
 
 NEO4J_URI = os.environ.get("NEO4J_URI")
@@ -13,29 +20,266 @@ NEO4J_PASSWORD = os.environ.get("NEO4J_PASSWORD")
 BATCH_SIZE = 100  # Define the batch size for insertion
 
 
-def insert_data_from_json(data, uri, auth):
+class EndpointNotFoundError(Exception):
+    """
+    Raised when a relationship could not be written because one of its endpoints does not exist.
+    """
+
+
+class DeadLetters:
+    """
+    Dead-letter file receiving one JSON line {"kind", "error", "record"} per record that could not be
+    inserted, kind being 'nodes' or 'relationships'. The file is only created when the first record
+    fails and is appended to, so earlier dead letters are never erased. The keys of the dead-lettered
+    nodes are kept so that the relationships pointing to them can be dead-lettered as well.
+    The records can be inserted again with load_dead_letters, or with --replay on the command line.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.node_keys = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self.file is not None:
+            self.file.close()
+        return False
+
+    def write(self, kind, record, error):
+        """
+        Writes a failing record to the dead-letter file.
+
+        Args:
+            kind (str): 'nodes' or 'relationships'.
+            record (dict): The record, a resolved relationship being written as its original relationship.
+            error (str): Description of the error.
+        """
+        if kind == "nodes":
+            key = node_key(record.get("label"), record.get("properties", {}))
+            if key is not None:
+                self.node_keys.add(key)
+        else:
+            record = record.get("relationship", record)
+        if self.file is None:
+            self.file = open(self.path, "a", encoding="utf-8")
+        self.file.write(json.dumps({"kind": kind, "error": error, "record": record}, ensure_ascii=False) + "\n")
+
+
+def default_dead_letter_path():
+    """
+    Returns a dead-letter file name specific to the current run.
+
+    Returns:
+        str: Path of the form dead_letters_<YYYYmmdd_HHMMSS>.jsonl.
+    """
+    return f"dead_letters_{datetime.now():%Y%m%d_%H%M%S}.jsonl"
+
+
+def load_dead_letters(path):
+    """
+    Loads the records of a dead-letter file back into the data format of insert_data_from_json,
+    so that they can be inserted again once the cause of their errors is fixed.
+
+    Args:
+        path (str): Path of the dead-letter file.
+    Returns:
+        dict: Data with the dead-lettered 'nodes' and 'relationships'.
+    """
+    data = {"nodes": [], "relationships": []}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                data[entry["kind"]].append(entry["record"])
+    return data
+
+
+def insert_data_from_json(data, uri, auth, dead_letter_path=None):
     """
     Inserts nodes and relationships into the Neo4j database in batches.
+    Failing batches are split and retried until the failing records are isolated and written to
+    the dead-letter file (see write_batch). Relationships pointing to a dead-lettered node are
+    dead-lettered without being sent.
     
     Args:
         data (dict): Data
         uri (str): URI for the Neo4j database.
         auth (tuple): A tuple of (username, password) for database authentication.
+        dead_letter_path (str): Path of the dead-letter file, by default specific to the run.
     """
+    dead_letter_path = dead_letter_path or default_dead_letter_path()
+    stats = new_stats()
     try:
-        with GraphDatabase.driver(uri, auth=auth) as driver:
+        with GraphDatabase.driver(uri, auth=auth) as driver, DeadLetters(dead_letter_path) as dead_letters:
             with driver.session() as session:
                 # Insert nodes in batches
                 print("Inserting nodes in batches...")
                 for batch in tqdm(batch_data(data.get("nodes", []), BATCH_SIZE), total=len(data.get("nodes", [])) // BATCH_SIZE):
-                    session.execute_write(create_nodes_batch, batch)
+                    write_batch(session, create_nodes_batch, batch, "nodes", stats, dead_letters)
 
                 # Insert relationships in batches
                 print("Inserting relationships in batches...")
                 for batch in tqdm(batch_data(data.get("relationships", []), BATCH_SIZE), total=len(data.get("relationships", [])) // BATCH_SIZE):
-                    session.execute_write(create_relationships_batch, batch)
+                    batch = drop_dead_lettered_endpoints(batch, stats, dead_letters)
+                    write_batch(session, create_relationships_batch, batch, "relationships", stats, dead_letters)
+
+                # Apply the controversy and sector mappings inside the graph
+                print("Canonicalizing controversies and activities...")
+                canonicalize_graph(session)
+
+                # Create the indexes queried by the dashboard
+                print("Creating indexes...")
+                create_indexes(session)
+    except Exception as e:
+        print(f"An error occurred: {e}")
+    print_summary(stats, dead_letter_path)
+
+
+def insert_data_from_json_two_phase(data, uri, auth, dead_letter_path=None):
+    """
+    Inserts nodes and relationships in two phases. The node phase merges the nodes in batches and
+    keeps the element id of each node in an in-memory map. The relationship phase then resolves both
+    endpoints of each relationship with a dictionary lookup and writes the edges by element id.
+    Relationships whose endpoints are not in the map fall back to the match_criteria lookup.
+    Failing batches are handled as in insert_data_from_json.
+
+    Args:
+        data (dict): Data
+        uri (str): URI for the Neo4j database.
+        auth (tuple): A tuple of (username, password) for database authentication.
+        dead_letter_path (str): Path of the dead-letter file, by default specific to the run.
+    """
+    dead_letter_path = dead_letter_path or default_dead_letter_path()
+    stats = new_stats()
+    try:
+        with GraphDatabase.driver(uri, auth=auth) as driver, DeadLetters(dead_letter_path) as dead_letters:
+            with driver.session() as session:
+                # Phase 1: merge nodes and collect their element ids
+                print("Inserting nodes in batches...")
+                id_map = {}
+                for batch in tqdm(batch_data(data.get("nodes", []), BATCH_SIZE), total=len(data.get("nodes", [])) // BATCH_SIZE):
+                    for ids in write_batch(session, create_nodes_batch_with_ids, batch, "nodes", stats, dead_letters):
+                        id_map.update(ids)
+
+                # Phase 2: write relationships between the resolved element ids
+                print("Inserting relationships in batches...")
+                unresolved = []
+                for batch in tqdm(batch_data(data.get("relationships", []), BATCH_SIZE), total=len(data.get("relationships", [])) // BATCH_SIZE):
+                    batch = drop_dead_lettered_endpoints(batch, stats, dead_letters)
+                    resolved, missing = resolve_relationships(batch, id_map)
+                    write_batch(session, create_relationships_batch_by_id, resolved, "relationships", stats, dead_letters)
+                    unresolved.extend(missing)
+
+                if unresolved:
+                    print(f"Inserting {len(unresolved)} relationships with unresolved endpoints...")
+                    for batch in tqdm(batch_data(unresolved, BATCH_SIZE), total=len(unresolved) // BATCH_SIZE):
+                        write_batch(session, create_relationships_batch, batch, "relationships", stats, dead_letters)
+
+                # Apply the controversy and sector mappings inside the graph
+                print("Canonicalizing controversies and activities...")
+                canonicalize_graph(session)
+
+                # Create the indexes queried by the dashboard
+                print("Creating indexes...")
+                create_indexes(session)
     except Exception as e:
         print(f"An error occurred: {e}")
+    print_summary(stats, dead_letter_path)
+
+
+def new_stats():
+    """
+    Creates the counters of records committed, retried and dead-lettered, for nodes and relationships.
+
+    Returns:
+        dict: Counters per kind of record.
+    """
+    return {kind: {"committed": 0, "retried": 0, "dead_lettered": 0} for kind in ("nodes", "relationships")}
+
+
+def drop_dead_lettered_endpoints(relationships_batch, stats, dead_letters):
+    """
+    Dead-letters the relationships pointing to a dead-lettered node, as they cannot be written.
+
+    Args:
+        relationships_batch (list): List of relationship data dictionaries.
+        stats (dict): Counters per kind of record, updated in place.
+        dead_letters (DeadLetters): Dead-letter file, holding the keys of the dead-lettered nodes.
+    Returns:
+        list: The other relationships of the batch.
+    """
+    remaining = []
+    for rel_data in relationships_batch:
+        for endpoint in ("start_node", "end_node"):
+            node = rel_data.get(endpoint)
+            key = node_key(node["label"], node["match_criteria"])
+            if key in dead_letters.node_keys:
+                dead_letters.write("relationships", rel_data, f"The {endpoint} {key} was dead-lettered")
+                stats["relationships"]["dead_lettered"] += 1
+                break
+        else:
+            remaining.append(rel_data)
+    return remaining
+
+
+def write_batch(session, transaction_function, batch, kind, stats, dead_letters, is_retry=False):
+    """
+    Writes a batch in a single transaction. If the transaction fails, the batch is split in half and
+    each half is retried recursively, so the valid records still commit in large transactions while
+    each failing record ends up alone and is written to the dead-letter file with its error.
+    Connection errors are raised, as retrying smaller batches would not fix them.
+
+    Args:
+        session: Neo4j session.
+        transaction_function: Function writing a batch in a transaction, e.g. create_nodes_batch.
+        batch (list): Records of the batch.
+        kind (str): 'nodes' or 'relationships'.
+        stats (dict): Counters per kind of record, updated in place.
+        dead_letters (DeadLetters): Dead-letter file receiving the failing records.
+        is_retry (bool): Whether the batch is part of a failed batch, so its records are counted once as retried.
+    Returns:
+        list: Results of the transaction function for each committed part of the batch.
+    """
+    if not batch:
+        return []
+    try:
+        result = session.execute_write(transaction_function, batch)
+        stats[kind]["committed"] += len(batch)
+        return [result]
+    except (ServiceUnavailable, SessionExpired):
+        raise
+    except Exception as e:
+        if len(batch) == 1:
+            dead_letters.write(kind, batch[0], str(e))
+            stats[kind]["dead_lettered"] += 1
+            return []
+        if not is_retry:
+            stats[kind]["retried"] += len(batch)
+        middle = len(batch) // 2
+        return (
+            write_batch(session, transaction_function, batch[:middle], kind, stats, dead_letters, is_retry=True)
+            + write_batch(session, transaction_function, batch[middle:], kind, stats, dead_letters, is_retry=True)
+        )
+
+
+def print_summary(stats, dead_letter_path):
+    """
+    Prints the number of records committed, retried and dead-lettered.
+
+    Args:
+        stats (dict): Counters per kind of record, as created by new_stats.
+        dead_letter_path (str): Path of the dead-letter file.
+    """
+    for kind, counters in stats.items():
+        print(
+            f"{kind.capitalize()}: {counters['committed']} committed, "
+            f"{counters['retried']} retried, {counters['dead_lettered']} dead-lettered"
+        )
+    if any(counters["dead_lettered"] for counters in stats.values()):
+        print(f"Dead-lettered records were written to {dead_letter_path}, insert them again with --replay {dead_letter_path}")
 
 
 def batch_data(iterable, batch_size):
@@ -55,60 +299,143 @@ def batch_data(iterable, batch_size):
 
 def create_nodes_batch(tx, nodes_batch):
     """
-    Creates a batch of nodes in the database.
+    Creates a batch of nodes in the database. Nodes are merged on their key properties
+    (see merge_keys) and their other properties are set, so each key maps to a single node.
+    Errors are raised so that write_batch can split and retry the batch.
     
     Args:
         tx: Neo4j transaction.
         nodes_batch (list): List of node data dictionaries.
     """
-    try:
-        for node_data in nodes_batch:
-            label = node_data.get("label")
-            properties = node_data.get("properties", {})
-            prop_str = ", ".join(f"{key}: ${key}" for key in properties.keys())
-            query = f"MERGE (n:{label} {{{prop_str}}})"
-            tx.run(query, **properties)
-    except Exception as e:
-        print(f"An error occurred while creating nodes batch: {e}")
+    for node_data in nodes_batch:
+        label = node_data.get("label")
+        properties = node_data.get("properties", {})
+        prop_str = ", ".join(f"{key}: $properties.{key}" for key in merge_keys(label, properties))
+        query = f"MERGE (n:{label} {{{prop_str}}}) SET n += $properties"
+        tx.run(query, properties=properties)
 
 
 def create_relationships_batch(tx, relationships_batch):
     """
     Creates a batch of relationships in the database.
+    Errors are raised so that write_batch can split and retry the batch, including an
+    EndpointNotFoundError when a relationship is not written because an endpoint does not exist.
     
     Args:
         tx: Neo4j transaction.
         relationships_batch (list): List of relationship data dictionaries.
     """
-    try:
-        for rel_data in relationships_batch:
-            start_node = rel_data.get("start_node")
-            end_node = rel_data.get("end_node")
-            rel_type = rel_data.get("type")
-            properties = rel_data.get("properties", {})
-            
-            start_label = start_node["label"]
-            end_label = end_node["label"]
-            start_criteria = " AND ".join(f"a.{key} = ${key}" for key in start_node["match_criteria"].keys())
-            end_criteria = " AND ".join(f"b.{key} = ${key}" for key in end_node["match_criteria"].keys())
-            prop_str = ", ".join(f"{key}: ${key}" for key in properties.keys())
-            
-            query = (
-                f"MATCH (a:{start_label}), (b:{end_label}) "
-                f"WHERE {start_criteria} AND {end_criteria} "
-                f"MERGE (a)-[r:{rel_type} {{{prop_str}}}]->(b)"
+    for rel_data in relationships_batch:
+        start_node = rel_data.get("start_node")
+        end_node = rel_data.get("end_node")
+        rel_type = rel_data.get("type")
+        properties = rel_data.get("properties", {})
+        
+        start_label = start_node["label"]
+        end_label = end_node["label"]
+        start_criteria = " AND ".join(f"a.{key} = ${key}" for key in start_node["match_criteria"].keys())
+        end_criteria = " AND ".join(f"b.{key} = ${key}" for key in end_node["match_criteria"].keys())
+        prop_str = ", ".join(f"{key}: ${key}" for key in properties.keys())
+        
+        query = (
+            f"MATCH (a:{start_label}), (b:{end_label}) "
+            f"WHERE {start_criteria} AND {end_criteria} "
+            f"MERGE (a)-[r:{rel_type} {{{prop_str}}}]->(b) "
+            f"RETURN count(r) AS relationships"
+        )
+        
+        params = {**start_node["match_criteria"], **end_node["match_criteria"], **properties}
+        if tx.run(query, **params).single()["relationships"] == 0:
+            raise EndpointNotFoundError(
+                f"No {start_label} matching {start_node['match_criteria']} "
+                f"or no {end_label} matching {end_node['match_criteria']}"
             )
-            
-            params = {**start_node["match_criteria"], **end_node["match_criteria"], **properties}
-            tx.run(query, **params)
-    except Exception as e:
-        print(f"An error occurred while creating relationships batch: {e}")
+
+
+def create_nodes_batch_with_ids(tx, nodes_batch):
+    """
+    Creates a batch of nodes in the database and returns their element ids.
+    Nodes are merged on their key properties and their other properties are set, as in
+    create_nodes_batch. Nodes sharing a label and key properties are merged with a single UNWIND query.
+
+    Args:
+        tx: Neo4j transaction.
+        nodes_batch (list): List of node data dictionaries.
+    Returns:
+        dict: Mapping of node key (see node_key) to element id.
+    """
+    id_map = {}
+    groups = {}
+    for node_data in nodes_batch:
+        label = node_data.get("label")
+        properties = node_data.get("properties", {})
+        groups.setdefault((label, merge_keys(label, properties)), []).append(properties)
+
+    for (label, keys), rows in groups.items():
+        prop_str = ", ".join(f"{key}: row.{key}" for key in keys)
+        query = (
+            f"UNWIND $rows AS row "
+            f"MERGE (n:{label} {{{prop_str}}}) "
+            f"SET n += row "
+            f"RETURN elementId(n) AS element_id"
+        )
+        # UNWIND yields one record per row, in the order of the rows
+        for properties, record in zip(rows, tx.run(query, rows=rows)):
+            key = node_key(label, properties)
+            if key is not None:
+                id_map[key] = record["element_id"]
+    return id_map
+
+
+def create_relationships_batch_by_id(tx, relationships_batch):
+    """
+    Creates a batch of relationships between nodes identified by their element ids.
+    Relationships sharing a type and a set of properties are merged with a single UNWIND query.
+    An EndpointNotFoundError is raised when an endpoint no longer exists, so that write_batch can
+    isolate the relationship.
+
+    Args:
+        tx: Neo4j transaction.
+        relationships_batch (list): List of resolved relationships, as returned by resolve_relationships.
+    """
+    groups = {}
+    for rel_data in relationships_batch:
+        properties = rel_data["properties"]
+        groups.setdefault((rel_data["type"], tuple(sorted(properties.keys()))), []).append(
+            {"start_id": rel_data["start_id"], "end_id": rel_data["end_id"], **properties}
+        )
+
+    for (rel_type, keys), rows in groups.items():
+        prop_str = ", ".join(f"{key}: row.{key}" for key in keys)
+        query = (
+            f"UNWIND $rows AS row "
+            f"MATCH (a) WHERE elementId(a) = row.start_id "
+            f"MATCH (b) WHERE elementId(b) = row.end_id "
+            f"MERGE (a)-[r:{rel_type} {{{prop_str}}}]->(b) "
+            f"RETURN count(r) AS relationships"
+        )
+        created = tx.run(query, rows=rows).single()["relationships"]
+        if created < len(rows):
+            raise EndpointNotFoundError(f"{len(rows) - created} {rel_type} relationships have an endpoint that no longer exists")
 
 
 if __name__ == "__main__":
-    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Insert nodes and relationships into Neo4j in batches.")
+    parser.add_argument("data", nargs="?", default="data.json", help="Path to the JSON data file.")
+    parser.add_argument("--two-phase", action="store_true", help="Resolve relationship endpoints with an in-memory element id map.")
+    parser.add_argument("--dead-letter", help="Path of the file receiving the records that failed, by default specific to the run.")
+    parser.add_argument("--replay", action="store_true", help="Insert again the records of a dead-letter file given as data.")
+    args = parser.parse_args()
 
-    with open("data.json") as f:
-        data = json.load(f)
+    if args.replay:
+        data = load_dead_letters(args.data)
+    else:
+        with open(args.data) as f:
+            data = json.load(f)
 
-    insert_data_from_json(data, NEO4J_URI, (NEO4J_USERNAME, NEO4J_PASSWORD))
+    if args.two_phase:
+        insert_data_from_json_two_phase(data, NEO4J_URI, (NEO4J_USERNAME, NEO4J_PASSWORD), args.dead_letter)
+    else:
+        insert_data_from_json(data, NEO4J_URI, (NEO4J_USERNAME, NEO4J_PASSWORD), args.dead_letter)
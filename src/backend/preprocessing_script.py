@@ -40,6 +40,8 @@ def csv_to_json(csv_file_path, json_file_path):
     Args:
         csv_file_path (str): Path to the CSV file.
         json_file_path (str): Path where the JSON file will be saved.
+    Returns:
+        dict: The final JSON structure, with 'nodes' and 'relationships'.
     """
     nodes = []
     relationships = []
@@ -184,8 +186,18 @@ def csv_to_json(csv_file_path, json_file_path):
     print(f"Total controversies: {controversies_counter}")
     print(f"Total relationships: {len(unique_relationships)}")
     # print(f"Successfully converted CSV file to JSON. {counter} errors occurred over {len(records)} records.")
+    return final_json
 
 if __name__ == "__main__":
-    csv_to_json("llm_output.csv", "data.json")
+    from src.backend.bulk_import import export_bulk_import, verify_bulk_import, import_command
+
+    data = csv_to_json("llm_output.csv", "data.json")
+
+    # CSV files for an initial load with the offline importer
+    written = export_bulk_import(data, "import")
+    for error in verify_bulk_import(written):
+        print(error)
+    print(import_command(written))
+    print("Then apply the controversy and sector mappings and create the indexes with: python -m src.backend.canonicalize")
 
 
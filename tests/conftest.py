@@ -0,0 +1,42 @@
+import os
+
+# backend.py creates its driver at import time, which needs a valid URI but no running database
+os.environ.setdefault("NEO4J_URI", "bolt://localhost:7687")
+
+
+class FakeResult:
+    def __init__(self, records):
+        self.records = records
+
+    def data(self):
+        return self.records
+
+
+class FakeSession:
+    """
+    Session answering each query with the records returned by respond(query, params),
+    or raising the exception it returns.
+    """
+
+    def __init__(self, respond):
+        self.respond = respond
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def run(self, query, **params):
+        records = self.respond(query, params)
+        if isinstance(records, Exception):
+            raise records
+        return FakeResult(records)
+
+
+class FakeDriver:
+    def __init__(self, respond):
+        self.respond = respond
+
+    def session(self):
+        return FakeSession(self.respond)
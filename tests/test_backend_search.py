@@ -0,0 +1,42 @@
+from conftest import FakeSession
+
+from src.backend.backend import SEARCH_CANDIDATES_FACTOR, escape_search_text, search_articles_by_keyword
+
+
+def test_escape_search_text():
+    assert escape_search_text('orpea (scandale) "ehpad"') == 'orpea \\(scandale\\) \\"ehpad\\"'
+    assert escape_search_text("a+b:c/d") == "a\\+b\\:c\\/d"
+
+
+def test_search_articles_by_keyword_parameters():
+    calls = []
+
+    def respond(query, params):
+        calls.append(params)
+        return [{
+            "name": "Scandale Orpea",
+            "url": "https://a",
+            "date": "2022-01-24T00:00:00Z",
+            "score": 2.5,
+            "controversies": ["Human Rights Controversies", "Human Rights Controversies"],
+            "perf_1": -20.0,
+            "perf_2": -50.0,
+        }]
+
+    data = search_articles_by_keyword(FakeSession(respond), "Orpea AND", sector="Hébergement médico-social et social", limit=5)
+
+    assert calls == [{
+        "search": "orpea and",
+        "sector": "Hébergement médico-social et social",
+        "controversy": None,
+        "limit": 5,
+        "candidates": 5 * SEARCH_CANDIDATES_FACTOR,
+    }]
+    assert data["controversies"].tolist() == ["Human Rights Controversies"]
+
+
+def test_search_articles_by_keyword_empty_text():
+    def respond(query, params):
+        raise AssertionError("no query expected")
+
+    assert search_articles_by_keyword(FakeSession(respond), "   ") is None
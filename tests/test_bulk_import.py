@@ -0,0 +1,100 @@
+import csv
+
+from src.backend.bulk_import import export_bulk_import, node_id, verify_bulk_import
+
+
+def read_csv(path):
+    with open(path, newline="", encoding="utf-8") as csvfile:
+        return list(csv.reader(csvfile))
+
+
+def relationship(start_label, start_criteria, end_label, end_criteria, rel_type):
+    return {
+        "start_node": {"label": start_label, "match_criteria": start_criteria},
+        "end_node": {"label": end_label, "match_criteria": end_criteria},
+        "type": rel_type,
+        "properties": {},
+    }
+
+
+DATA = {
+    "nodes": [
+        {"label": "Article", "properties": {"name": 'Orpea, "le scandale"\nsuite', "url": "https://a"}},
+        {"label": "Article", "properties": {"url": "https://a"}},
+        {"label": "Article", "properties": {"name": "Renault", "url": "https://b"}},
+        {"label": "Article", "properties": {"name": "Renault, suite", "url": "https://b"}},
+        {"label": "Company", "properties": {"name": "Orpea"}},
+        {"label": "Company", "properties": {"name": "Orpea"}},
+        {"label": "Controversy", "properties": {"name": "Environmental Controversies"}},
+    ],
+    "relationships": [
+        relationship("Article", {"url": "https://a"}, "Company", {"name": "Orpea"}, "MENTIONS"),
+        relationship("Article", {"url": "https://a"}, "Company", {"name": "Orpea"}, "MENTIONS"),
+        relationship("Article", {"url": "https://b"}, "Controversy", {"name": "Environmental Controversies"}, "LINKED_TO"),
+        # Unknown endpoint
+        relationship("Article", {"url": "https://c"}, "Company", {"name": "Orpea"}, "MENTIONS"),
+    ],
+}
+
+
+def test_export_files_and_headers(tmp_path):
+    written = export_bulk_import(DATA, tmp_path)
+
+    assert [path.split("/")[-1] for path in written["nodes"]] == ["nodes_Article.csv", "nodes_Company.csv", "nodes_Controversy.csv"]
+    assert [path.split("/")[-1] for path in written["relationships"]] == ["relationships_LINKED_TO.csv", "relationships_MENTIONS.csv"]
+    assert read_csv(written["nodes"][0])[0] == [":ID", "name", "url", ":LABEL"]
+    assert read_csv(written["nodes"][1])[0] == [":ID", "name", ":LABEL"]
+    assert read_csv(written["relationships"][1])[0] == [":START_ID", ":END_ID", ":TYPE"]
+
+
+def test_export_deduplicates_nodes(tmp_path):
+    written = export_bulk_import(DATA, tmp_path)
+
+    articles = read_csv(written["nodes"][0])[1:]
+    companies = read_csv(written["nodes"][1])[1:]
+    assert len(articles) == 2
+    assert len(companies) == 1
+    # Special characters survive the CSV round trip and the duplicate without a name keeps it
+    article_a = next(row for row in articles if row[2] == "https://a")
+    assert article_a == [node_id(("Article", "https://a")), 'Orpea, "le scandale"\nsuite', "https://a", "Article"]
+    # As with SET n += properties in the MERGE ingest, the last value wins
+    article_b = next(row for row in articles if row[2] == "https://b")
+    assert article_b[1] == "Renault, suite"
+
+
+def test_export_null_value_removes_property(tmp_path):
+    data = {"nodes": [
+        {"label": "Company", "properties": {"name": "Orpea", "ticker": "EMEIS.PA"}},
+        {"label": "Company", "properties": {"name": "Orpea", "ticker": None}},
+    ]}
+    written = export_bulk_import(data, tmp_path)
+
+    assert read_csv(written["nodes"][0]) == [[":ID", "name", ":LABEL"], [node_id(("Company", "Orpea")), "Orpea", "Company"]]
+
+
+def test_export_relationships_reference_nodes(tmp_path):
+    written = export_bulk_import(DATA, tmp_path)
+
+    linked_to = read_csv(written["relationships"][0])[1:]
+    mentions = read_csv(written["relationships"][1])[1:]
+    # The duplicate is removed and the relationship with an unknown endpoint is dropped
+    assert mentions == [[node_id(("Article", "https://a")), node_id(("Company", "Orpea")), "MENTIONS"]]
+    assert linked_to == [[node_id(("Article", "https://b")), node_id(("Controversy", "Environmental Controversies")), "LINKED_TO"]]
+
+    node_ids = {row[0] for path in written["nodes"] for row in read_csv(path)[1:]}
+    for row in linked_to + mentions:
+        assert row[0] in node_ids and row[1] in node_ids
+    assert verify_bulk_import(written) == []
+
+
+def test_node_ids_are_stable():
+    assert node_id(("Article", "https://a")) == node_id(("Article", "https://a"))
+    assert node_id(("Article", "https://a")) != node_id(("Company", "https://a"))
+
+
+def test_verify_detects_unknown_ids(tmp_path):
+    written = export_bulk_import(DATA, tmp_path)
+    with open(written["relationships"][1], "a", newline="", encoding="utf-8") as csvfile:
+        csv.writer(csvfile).writerow(["Article:unknown", node_id(("Company", "Orpea")), "MENTIONS"])
+
+    assert verify_bulk_import(written) == [f"{written['relationships'][1]}:3: unknown node id Article:unknown"]
@@ -0,0 +1,27 @@
+from conftest import FakeDriver
+
+from src.backend import backend, generate_reports
+
+
+def respond(query, params):
+    if query == backend.articles_for_sector_controversy:
+        return RuntimeError("query timed out")
+    return []
+
+
+def test_compute_sector_reports_query_errors(monkeypatch):
+    monkeypatch.setattr(generate_reports, "driver", FakeDriver(respond))
+
+    _, summary = generate_reports.compute_sector("Restauration")
+
+    assert summary["error"] == "query timed out"
+
+
+def test_compute_sector_without_data(monkeypatch):
+    monkeypatch.setattr(generate_reports, "driver", FakeDriver(lambda query, params: []))
+
+    datasets, summary = generate_reports.compute_sector("Restauration")
+
+    assert summary["error"] is None
+    assert datasets == {"risk_repartition": None, "financial_impact": None, "top_articles": None}
+    assert summary["top_articles_rows"] == 0
@@ -0,0 +1,76 @@
+from src.backend.graph_keys import merge_keys, node_key, resolve_relationships
+
+
+def relationship(start_label, start_criteria, end_label, end_criteria, rel_type="MENTIONS"):
+    return {
+        "start_node": {"label": start_label, "match_criteria": start_criteria},
+        "end_node": {"label": end_label, "match_criteria": end_criteria},
+        "type": rel_type,
+        "properties": {},
+    }
+
+
+def test_node_key_uses_label_key_properties():
+    assert node_key("Article", {"name": "Title", "url": "https://a"}) == ("Article", "https://a")
+    assert node_key("Article", {"url": "https://a"}) == ("Article", "https://a")
+    assert node_key("Sector", {"sector_name": "Restauration"}) == ("Sector", "Restauration")
+
+
+def test_node_key_missing_key_property():
+    assert node_key("Article", {"name": "Title"}) is None
+
+
+def test_node_key_unknown_label_uses_all_properties():
+    assert node_key("Other", {"b": 2, "a": 1}) == ("Other", 1, 2)
+
+
+def test_merge_keys():
+    assert merge_keys("Article", {"name": "Title", "url": "https://a"}) == ("url",)
+    assert merge_keys("Article", {"name": "Title"}) == ("name",)
+    assert merge_keys("Other", {"b": 2, "a": 1}) == ("a", "b")
+
+
+def test_resolve_relationships():
+    id_map = {("Article", "https://a"): "4:x:1", ("Company", "Orpea"): "4:x:2"}
+    known = relationship("Article", {"url": "https://a"}, "Company", {"name": "Orpea"})
+    unknown = relationship("Article", {"url": "https://b"}, "Company", {"name": "Orpea"})
+
+    resolved, unresolved = resolve_relationships([known, unknown], id_map)
+
+    assert resolved == [{
+        "type": "MENTIONS",
+        "start_id": "4:x:1",
+        "end_id": "4:x:2",
+        "properties": {},
+        "relationship": known,
+    }]
+    assert unresolved == [unknown]
+
+
+def test_resolve_relationships_missing_criteria():
+    rel = relationship("Article", {"name": "Title"}, "Company", {"name": "Orpea"})
+    resolved, unresolved = resolve_relationships([rel], {("Company", "Orpea"): "4:x:2"})
+    assert resolved == []
+    assert unresolved == [rel]
+
+
+class RecordingTransaction:
+    def __init__(self):
+        self.queries = []
+
+    def run(self, query, **params):
+        self.queries.append((query, params))
+
+
+def test_ingest_scripts_merge_nodes_on_the_same_keys():
+    from src.backend.populate_database import create_node
+    from src.backend.populate_database_batched import create_nodes_batch
+
+    article = {"label": "Article", "properties": {"name": "Title", "url": "https://a"}}
+    single, batched = RecordingTransaction(), RecordingTransaction()
+    create_node(single, article)
+    create_nodes_batch(batched, [article])
+
+    assert single.queries == batched.queries == [
+        ("MERGE (n:Article {url: $properties.url}) SET n += $properties", {"properties": article["properties"]}),
+    ]
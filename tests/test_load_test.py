@@ -0,0 +1,70 @@
+from conftest import FakeDriver
+
+from src.backend import backend
+from src.backend.load_test import run_level
+
+
+def respond(query, params):
+    if query == backend.articles_for_sector_controversy:
+        return RuntimeError("query timed out")
+    return []
+
+
+def test_run_level_counts_errors_per_function():
+    stats = run_level(FakeDriver(respond), nb_users=3, sectors=["Restauration", "Génie civil"], nb_sectors=2, think_time=0.0, seed=0)
+    stats = stats.set_index("function")
+
+    assert (stats["users"] == 3).all()
+    # Each user loads the page 3 times, opening included, and each load calls the 6 functions of app.py
+    for function in [
+        "get_nb_controversies_per_activity",
+        "get_data_for_risk_repartition",
+        "get_data_nb_controverties_distrib",
+        "get_data_financial_impact_by_controversy_per_sector",
+        "get_articles_for_sector_controversy",
+        "get_controversies_list",
+    ]:
+        assert stats.loc[function, "calls"] == 9
+    assert stats.loc["get_articles_for_sector_controversy", "errors"] == 9
+    assert stats.loc["get_data_for_risk_repartition", "errors"] == 0
+    assert "search_articles_by_keyword" not in stats.index
+    assert stats.loc["all", "calls"] == 9 * 6
+    assert stats.loc["all", "errors"] == 9
+
+
+def test_page_loads_follow_app_reruns():
+    calls = []
+
+    def record(query, params):
+        calls.append((query, params.get("sector")))
+        return []
+
+    run_level(FakeDriver(record), nb_users=1, sectors=["Restauration", "Génie civil"], nb_sectors=1, think_time=0.0, seed=0)
+
+    page = [
+        backend.overview_data,
+        backend.controversy_repartition,
+        backend.nb_controversies_distribution,
+        backend.financial_impact_by_controversy_per_sector,
+        backend.articles_for_sector_controversy,
+        backend.controversies_list,
+    ]
+    assert [query for query, _ in calls] == page * 2
+    # Opening the dashboard selects the first sector
+    assert [sector for _, sector in calls[:6] if sector is not None] == ["Restauration"] * 3
+
+
+def test_page_loads_search_when_text_is_set():
+    calls = []
+
+    def record(query, params):
+        calls.append((query, params))
+        return []
+
+    run_level(FakeDriver(record), nb_users=2, sectors=["Restauration"], nb_sectors=1, think_time=0.0, seed=0, search_text="pollution")
+
+    searches = [params for query, params in calls if query == backend.search_articles]
+    # The search text is kept across reruns, so every page load searches
+    assert len(searches) == 2 * 2
+    assert all(params["search"] == "pollution" for params in searches)
+    assert len(calls) == 2 * 2 * 7
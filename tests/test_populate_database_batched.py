@@ -0,0 +1,134 @@
+import json
+
+import pytest
+
+from src.backend.populate_database_batched import (
+    DeadLetters,
+    EndpointNotFoundError,
+    create_relationships_batch,
+    drop_dead_lettered_endpoints,
+    load_dead_letters,
+    new_stats,
+    write_batch,
+)
+
+
+def node(name):
+    return {"label": "Company", "properties": {"name": name}}
+
+
+def mentions(url, company):
+    return {
+        "start_node": {"label": "Article", "match_criteria": {"url": url}},
+        "end_node": {"label": "Company", "match_criteria": {"name": company}},
+        "type": "MENTIONS",
+        "properties": {},
+    }
+
+
+class FailingSession:
+    """
+    Session whose transactions fail when the batch holds a record named 'bad...'.
+    """
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def execute_write(self, transaction_function, batch):
+        self.batch_sizes.append(len(batch))
+        if any(record["properties"]["name"].startswith("bad") for record in batch):
+            raise ValueError("invalid record")
+        return len(batch)
+
+
+def read_dead_letters(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_write_batch_isolates_failing_records(tmp_path):
+    path = tmp_path / "dead_letters.jsonl"
+    batch = [node(f"company {i}") for i in range(100)]
+    batch[17] = node("bad 1")
+    batch[80] = node("bad 2")
+    stats = new_stats()
+
+    with DeadLetters(path) as dead_letters:
+        results = write_batch(FailingSession(), None, batch, "nodes", stats, dead_letters)
+
+    assert sum(results) == 98
+    assert stats["nodes"] == {"committed": 98, "retried": 100, "dead_lettered": 2}
+    assert read_dead_letters(path) == [
+        {"kind": "nodes", "error": "invalid record", "record": node("bad 1")},
+        {"kind": "nodes", "error": "invalid record", "record": node("bad 2")},
+    ]
+
+
+def test_dead_letter_file_only_created_on_failure(tmp_path):
+    path = tmp_path / "dead_letters.jsonl"
+    stats = new_stats()
+
+    with DeadLetters(path) as dead_letters:
+        write_batch(FailingSession(), None, [node("Orpea")], "nodes", stats, dead_letters)
+
+    assert stats["nodes"] == {"committed": 1, "retried": 0, "dead_lettered": 0}
+    assert not path.exists()
+
+
+def test_dead_letter_file_is_appended(tmp_path):
+    path = tmp_path / "dead_letters.jsonl"
+    for _ in range(2):
+        with DeadLetters(path) as dead_letters:
+            write_batch(FailingSession(), None, [node("bad")], "nodes", new_stats(), dead_letters)
+
+    assert len(read_dead_letters(path)) == 2
+
+
+def test_relationships_to_dead_lettered_nodes_are_dead_lettered(tmp_path):
+    path = tmp_path / "dead_letters.jsonl"
+    stats = new_stats()
+    kept = mentions("https://a", "Orpea")
+    dropped = mentions("https://a", "bad")
+
+    with DeadLetters(path) as dead_letters:
+        write_batch(FailingSession(), None, [node("Orpea"), node("bad")], "nodes", stats, dead_letters)
+        remaining = drop_dead_lettered_endpoints([kept, dropped], stats, dead_letters)
+
+    assert remaining == [kept]
+    assert stats["relationships"]["dead_lettered"] == 1
+    assert read_dead_letters(path)[-1] == {
+        "kind": "relationships",
+        "error": "The end_node ('Company', 'bad') was dead-lettered",
+        "record": dropped,
+    }
+
+
+def test_load_dead_letters_replays_records(tmp_path):
+    path = tmp_path / "dead_letters.jsonl"
+    rel = mentions("https://a", "Orpea")
+    with DeadLetters(path) as dead_letters:
+        dead_letters.write("nodes", node("bad"), "invalid record")
+        # Resolved relationships are written as their original relationship
+        dead_letters.write("relationships", {"start_id": "4:x:1", "end_id": "4:x:2", "relationship": rel}, "error")
+
+    assert load_dead_letters(path) == {"nodes": [node("bad")], "relationships": [rel]}
+
+
+class CountingTransaction:
+    def __init__(self, count):
+        self.count = count
+
+    def run(self, query, **params):
+        count = self.count
+
+        class Result:
+            def single(self):
+                return {"relationships": count}
+
+        return Result()
+
+
+def test_create_relationships_batch_detects_missing_endpoints():
+    create_relationships_batch(CountingTransaction(1), [mentions("https://a", "Orpea")])
+    with pytest.raises(EndpointNotFoundError):
+        create_relationships_batch(CountingTransaction(0), [mentions("https://a", "Orpea")])